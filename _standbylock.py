@@ -14,11 +14,28 @@ Current_Version_Note ::
 from functools import wraps
 import platform
 
+_SYSTEM = platform.system()
+_SYSTEM_UPPER = _SYSTEM.upper()
+
+# upper-cased class name prefix -> OS it implements the lock for
+_PLATFORM_PREFIXES = {"WINDOWS": "Windows", "LINUX": "Linux", "DARWIN": "Darwin"}
+
+if _SYSTEM == "Windows":
+    import ctypes
+    _SetThreadExecutionState = ctypes.windll.kernel32.SetThreadExecutionState
+    _SetThreadExecutionState.argtypes = [ctypes.c_uint]
+    _SetThreadExecutionState.restype = ctypes.c_uint
+else:
+    _SetThreadExecutionState = None
+
+if _SYSTEM in ("Linux", "Darwin"):
+    import subprocess
+
 class MetaStandbyLock(type):
     """
     """
 
-    SYSTEM = platform.system()
+    SYSTEM = _SYSTEM
 
     def __new__(cls, name: str, bases: tuple, attrs: dict) -> type:
         if not ('inhibit' in attrs and 'release' in attrs):
@@ -27,13 +44,19 @@ class MetaStandbyLock(type):
             if name == 'StandbyLock':
                 cls._superclass = super().__new__(cls, name, bases, attrs)
                 return cls._superclass
-            if cls.SYSTEM.upper() in name.upper():
-                if not hasattr(cls, '_superclass'):
-                    raise ValueError("Class 'StandbyLock' must be implemented.")
-                cls._superclass._subclass = super().__new__(cls, name, bases, attrs)
-                return cls._superclass._subclass
-            else:
+            prefix = name.upper().removesuffix('STANDBYLOCK')
+            if prefix not in _PLATFORM_PREFIXES:
                 return super().__new__(cls, name, bases, attrs)
+            if prefix != _SYSTEM_UPPER:
+                return None  # implementation for another OS, never built
+            if not hasattr(cls, '_superclass'):
+                raise ValueError("Class 'StandbyLock' must be implemented.")
+            subclass = super().__new__(cls, name, bases, attrs)
+            cls._superclass._subclass = subclass
+            # call straight into the implementation instead of through the classmethod checks
+            cls._superclass.inhibit = staticmethod(subclass.inhibit)
+            cls._superclass.release = staticmethod(subclass.release)
+            return subclass
 
 class StandbyLock(metaclass=MetaStandbyLock):
     """
@@ -72,15 +95,15 @@ class WindowsStandbyLock(StandbyLock):
     INHIBIT = ES_CONTINUOUS | ES_SYSTEM_REQUIRED
     RELEASE = ES_CONTINUOUS
 
+    _set_thread_execution_state = _SetThreadExecutionState
+
     @classmethod
     def inhibit(cls):
-        import ctypes
-        ctypes.windll.kernel32.SetThreadExecutionState(cls.INHIBIT)
+        cls._set_thread_execution_state(cls.INHIBIT)
 
     @classmethod
     def release(cls):
-        import ctypes
-        ctypes.windll.kernel32.SetThreadExecutionState(cls.RELEASE)
+        cls._set_thread_execution_state(cls.RELEASE)
 
 class LinuxStandbyLock(metaclass=MetaStandbyLock):
     """
@@ -91,12 +114,10 @@ class LinuxStandbyLock(metaclass=MetaStandbyLock):
 
     @classmethod
     def inhibit(cls):
-        import subprocess
         subprocess.run([cls.COMMAND, 'mask', *cls.ARGS])
 
     @classmethod
     def release(cls):
-        import subprocess
         subprocess.run([cls.COMMAND, 'unmask', *cls.ARGS])
 
 class DarwinStandbyLock(metaclass=MetaStandbyLock):
@@ -110,8 +131,7 @@ class DarwinStandbyLock(metaclass=MetaStandbyLock):
 
     @classmethod
     def inhibit(cls):
-        from subprocess import Popen, PIPE
-        cls._process = Popen([cls.COMMAND], stdin=PIPE, stdout=PIPE)
+        cls._process = subprocess.Popen([cls.COMMAND], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
 
     @classmethod
     def release(cls):
@@ -1,10 +1,15 @@
 import os
-import time
-import requests
+import socket
+import urllib3
 import threading
-from math import ceil
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
+from urllib3.util import Retry
+from urllib3.util.connection import allowed_gai_family
+from functools import lru_cache
+from contextlib import contextmanager
+from urllib.parse import unquote, urljoin, urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+
+import re
 import sys
 import json
 import argparse
@@ -13,6 +18,11 @@ from pathlib import Path
 from pprint import pprint
 from _standbylock import StandbyLock
 
+try:
+    import orjson as _json
+except ImportError:
+    _json = json
+
 from rich.progress import (
     Progress,
     BarColumn,
@@ -27,6 +37,164 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 TXT_DATA_FILEPATH = str(SCRIPT_DIR.joinpath("url_inputs.txt"))
 JSON_DATA_FILEPATH = str(SCRIPT_DIR.joinpath("url_inputs.json"))
 UNFINISHED_DOWNLOADS_FILEPATH = str(SCRIPT_DIR.joinpath("unfinished_downloads.json"))
+HEAD_CACHE_FILEPATH = str(SCRIPT_DIR.joinpath(".downloader_cache.json"))
+
+CHUNK_SIZE = 256 * 1024              # bytes read from the socket per iteration
+WRITE_BATCH_SIZE = 1024 * 1024       # bytes gathered before one vectored write to disk
+WRITE_BATCH_CHUNKS = 64              # ...or this many chunks, well below IOV_MAX
+PROGRESS_UPDATE_INTERVAL = 0.1       # seconds between progress bar refreshes
+MIN_PART_SIZE = 4 * 1024 * 1024     # smaller parts cost more in HTTP overhead than they gain
+STATE_SAVE_BYTES = 16 * 1024 * 1024  # persist resume state after this many bytes per part
+MAX_RETRY_WAIT = 60                  # cap (seconds) for the per-part retry backoff
+HEAD_CACHE_MAX_ENTRIES = 10000       # least recently seen urls are dropped past this
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}  # Pretend to be a browser
+REQUEST_TIMEOUT = urllib3.Timeout(connect=5, read=30)
+
+# urllib3.exceptions.HTTPError covers timeouts, dropped connections, truncated
+# bodies and retries exhausted on a bad status
+RETRYABLE_ERRORS = (urllib3.exceptions.HTTPError, OSError)
+
+JSON_COMMENT_LINE = re.compile(rb'^[ \t]*(#|//).*$', re.M)
+FILENAME_TRANSLATION = str.maketrans({'"': None, **dict.fromkeys('/\\<>:|?*', '_'),  # decoded %2F/%5C, Windows-reserved
+                                      **dict.fromkeys(map(chr, [*range(32), 127]), '_')})  # %00 and other controls
+MAX_FILENAME_LENGTH = 205
+FILENAME_SUFFIX_LENGTH = 4  # tail kept when truncating, e.g. ".mp4"
+
+DEFAULT_MAX_WORKERS = min(32, os.cpu_count() * 2)
+MAX_CONCURRENT_FILES = 8
+
+
+class HTTPStatusError(urllib3.exceptions.HTTPError):
+    """Raised for a 4xx/5xx response that survived the pool's own retries."""
+
+
+def build_pool(max_workers=DEFAULT_MAX_WORKERS):
+    """Create the urllib3 PoolManager whose connections are shared by every download."""
+    return urllib3.PoolManager(
+        num_pools=32,
+        maxsize=max_workers * 16,
+        block=False,
+        headers=DEFAULT_HEADERS,
+        timeout=REQUEST_TIMEOUT,
+        retries=Retry(
+            total=8,
+            connect=5,
+            read=5,
+            status=5,
+            backoff_factor=1.0,
+            status_forcelist=(408, 429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+        ),
+    )
+
+
+POOL = build_pool()
+
+
+@contextmanager
+def pool_request(method, url, headers=None):
+    """Stream a request through POOL and hand the connection back afterwards."""
+    # headers passed per request replace the pool defaults instead of extending them
+    response = POOL.request(method, url, headers={**DEFAULT_HEADERS, **(headers or {})}, preload_content=False)
+    try:
+        yield response
+    finally:
+        response.close()  # drops the socket only if the body was not read to the end
+        response.release_conn()
+
+
+def head(url):
+    """HEAD url following redirects; returns (response, final absolute url)."""
+    with pool_request("HEAD", url) as response:
+        pass
+    # urllib3 only keeps the request path of the last hop, rebuild the absolute url
+    final_url = url
+    for hop in (response.retries.history if response.retries else ()):
+        if hop.redirect_location:
+            final_url = urljoin(final_url, hop.redirect_location)
+    return response, final_url
+
+
+def raise_for_status(response):
+    if response.status >= 400:
+        raise HTTPStatusError(f"{response.status} {response.reason}")
+
+
+# -------------------------------
+# DNS cache
+# -------------------------------
+_system_getaddrinfo = socket.getaddrinfo
+_GETADDRINFO_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=1024)
+def _cached_getaddrinfo(*args, **kwargs):
+    return _system_getaddrinfo(*args, **kwargs)
+
+
+def install_dns_cache():
+    """Route socket.getaddrinfo through an in-process cache (idempotent)."""
+    with _GETADDRINFO_LOCK:
+        if socket.getaddrinfo is not _cached_getaddrinfo:
+            socket.getaddrinfo = _cached_getaddrinfo
+
+
+install_dns_cache()
+
+
+def _resolve(host, port):
+    # same arguments urllib3 uses when connecting, so the lookup lands in the cache
+    try:
+        socket.getaddrinfo(host, port, allowed_gai_family(), socket.SOCK_STREAM)
+    except OSError:
+        pass  # the download itself will report the failure
+
+
+def prepare_downloads(files, max_workers=MAX_CONCURRENT_FILES):
+    """
+        Drop repeated (url, storage_dir) entries, group the rest by host and
+        pre-resolve each host concurrently.
+    """
+    # the first entry wins; a repeat would download into the same target at the same time
+    unique = {}
+    for url, storage_dir, ep in files:
+        unique.setdefault((url, storage_dir), (url, storage_dir, ep))
+    files = sorted(unique.values(), key=lambda data: urlsplit(data[0]).hostname or "")
+    hosts = set()
+    for url, *_ in files:
+        parts = urlsplit(url)
+        if parts.hostname:
+            hosts.add((parts.hostname, parts.port or (443 if parts.scheme == "https" else 80)))
+    if hosts:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(hosts)), thread_name_prefix="dl-dns") as executor:
+            list(executor.map(lambda host: _resolve(*host), hosts))
+    return files
+
+# host -> whether a "Range: bytes=0-0" probe came back as 206
+_RANGE_SUPPORT = {}
+_RANGE_SUPPORT_LOCK = threading.Lock()
+
+
+def supports_ranges(url, response):
+    """Tell whether the server behind url (and its HEAD response) honours Range requests."""
+    if response.headers.get("Accept-Ranges", "none").lower() == "none":
+        return False
+
+    host = urlsplit(url).netloc
+    with _RANGE_SUPPORT_LOCK:
+        if host in _RANGE_SUPPORT:
+            return _RANGE_SUPPORT[host]
+
+    try:
+        with pool_request("GET", url, headers={"Range": "bytes=0-0"}) as probe:
+            supported = probe.status == 206
+    except RETRYABLE_ERRORS:
+        return False  # a network hiccup says nothing about the host, ask again next time
+
+    with _RANGE_SUPPORT_LOCK:
+        _RANGE_SUPPORT[host] = supported
+    return supported
 
 
 def choose_threads(file_size):
@@ -39,47 +207,389 @@ def choose_threads(file_size):
         return min(16, max(4, file_size // (100 * 1024 * 1024)))
 
 
+# -------------------------------
+# HEAD cache
+# -------------------------------
+_HEAD_CACHE = None
+_HEAD_CACHE_DIRTY = False
+_HEAD_CACHE_LOCK = threading.Lock()
+
+
+def _load_head_cache():
+    global _HEAD_CACHE
+    if _HEAD_CACHE is None:
+        try:
+            with open(HEAD_CACHE_FILEPATH, 'r', encoding='utf-8') as fh:
+                _HEAD_CACHE = json.load(fh)
+        except (OSError, ValueError):
+            _HEAD_CACHE = {}
+    return _HEAD_CACHE
+
+
+def _cached_head(url):
+    """Entry stored for the last HEAD of url, or None."""
+    with _HEAD_CACHE_LOCK:
+        return _load_head_cache().get(url)
+
+
+def _cache_head(url, response, file_size):
+    """Remember the Content-Length (and Content-Disposition) a HEAD of url returned."""
+    entry = {
+        "content_length": file_size,
+        "content_disposition": response.headers.get("Content-Disposition"),
+    }
+    global _HEAD_CACHE_DIRTY
+    with _HEAD_CACHE_LOCK:
+        cache = _load_head_cache()
+        cache.pop(url, None)  # re-insert so the dict stays ordered oldest to newest
+        cache[url] = entry
+        _HEAD_CACHE_DIRTY = True
+
+
+def save_head_cache():
+    """Write the HEAD cache to disk if it changed, keeping only the newest entries."""
+    global _HEAD_CACHE_DIRTY
+    with _HEAD_CACHE_LOCK:
+        if not _HEAD_CACHE_DIRTY:
+            return
+        for url in list(_HEAD_CACHE)[:-HEAD_CACHE_MAX_ENTRIES]:
+            del _HEAD_CACHE[url]
+        tmp_path = f"{HEAD_CACHE_FILEPATH}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(_HEAD_CACHE, fh)
+        os.replace(tmp_path, HEAD_CACHE_FILEPATH)
+        _HEAD_CACHE_DIRTY = False
+
+
+# -------------------------------
+# Disk helpers
+# -------------------------------
+_SEEK_WRITE_LOCK = threading.Lock()
+
+
+def open_target(filename, file_size, truncate):
+    """Open (and preallocate) the final file so every part can write into it in place."""
+    flags = os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0)
+    if truncate:
+        flags |= os.O_TRUNC
+    fd = os.open(filename, flags, 0o644)
+    try:
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fd, 0, file_size)
+        else:
+            os.ftruncate(fd, file_size)
+    except OSError:
+        os.ftruncate(fd, file_size)  # filesystem without fallocate support
+    return fd
+
+
+def write_at(fd, data, offset):
+    """Write data at offset without moving a shared file position."""
+    view = memoryview(data)
+    if hasattr(os, "pwrite"):
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+    else:
+        # Windows has no pwrite: serialize seek + write
+        with _SEEK_WRITE_LOCK:
+            os.lseek(fd, offset, os.SEEK_SET)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+
+
+def write_batch_at(fd, chunks, offset):
+    """Write consecutive chunks starting at offset, in one pwritev call where available."""
+    if hasattr(os, "pwritev"):
+        written = os.pwritev(fd, chunks, offset)
+        total = sum(map(len, chunks))
+        if written < total:  # short write, finish the remainder
+            write_at(fd, b"".join(chunks)[written:], offset + written)
+        return
+    for chunk in chunks:
+        write_at(fd, chunk, offset)
+        offset += len(chunk)
+
+
+class BatchWriter:
+    """Gathers chunks for consecutive offsets so they reach the disk in batches."""
+
+    def __init__(self, fd, offset):
+        self.fd = fd
+        self.offset = offset
+        self._chunks = []
+        self._pending = 0
+
+    def write(self, chunk):
+        """Queue chunk and return the number of bytes this call flushed to disk."""
+        self._chunks.append(chunk)
+        self._pending += len(chunk)
+        if self._pending >= WRITE_BATCH_SIZE or len(self._chunks) >= WRITE_BATCH_CHUNKS:
+            return self.flush()
+        return 0
+
+    def flush(self):
+        if not self._chunks:
+            return 0
+        chunks, flushed = self._chunks, self._pending
+        self._chunks, self._pending = [], 0
+        write_batch_at(self.fd, chunks, self.offset)
+        self.offset += flushed
+        return flushed
+
+
+class ResumeState:
+    """
+        Per-file sidecar manifest ({filename}.meta.json) recording how far each part got:
+        {"file_size": N, "parts": [{"start": s, "end": e, "written": w}, ...]}
+
+        The manifest is padded to a fixed size and rewritten in place, so saving never
+        allocates a new file or changes its length.
+    """
+
+    def __init__(self, filename, file_size, ranges):
+        self.path = f"{filename}.meta.json"
+        self.lock = threading.Lock()
+        self.file_size = file_size
+        self.parts = self._load(ranges)
+        self._fd = None
+        self._capacity = self._manifest_capacity(ranges)
+
+    def _load(self, ranges):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                meta = json.load(fh)
+            parts = meta["parts"]
+            if meta["file_size"] != self.file_size:
+                return None
+            if [(part["start"], part["end"]) for part in parts] != list(ranges):
+                return None
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return parts
+
+    def _manifest_capacity(self, ranges):
+        # the serialized manifest is longest when every part is complete
+        full = [{"start": start, "end": end, "written": end - start + 1} for start, end in ranges]
+        return len(self._serialize(full))
+
+    def _serialize(self, parts):
+        return json.dumps({"file_size": self.file_size, "parts": parts}).encode()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def reset(self, ranges):
+        self.parts = [{"start": start, "end": end, "written": 0} for start, end in ranges]
+        self.save()
+
+    def written(self, part_num):
+        return self.parts[part_num]["written"]
+
+    def total_written(self):
+        return sum(part["written"] for part in self.parts)
+
+    def update(self, part_num, written):
+        with self.lock:
+            self.parts[part_num]["written"] = written
+            self._save_locked()
+
+    def save(self):
+        with self.lock:
+            self._save_locked()
+
+    def _save_locked(self):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+            os.ftruncate(self._fd, self._capacity)
+        write_at(self._fd, self._serialize(self.parts).ljust(self._capacity), 0)
+
+    def close(self):
+        with self.lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# -------------------------------
+# Progress reporting
+# -------------------------------
+class ProgressCounter:
+    """
+        Byte counter for one file with a slot per part. Each slot has a single
+        writer (its part's thread), so no lock is needed; readers only sum.
+    """
+
+    def __init__(self, completed, num_parts):
+        self._completed = completed
+        self._parts = [0] * num_parts
+
+    def add(self, part_num, n):
+        self._parts[part_num] += n
+
+    @property
+    def value(self):
+        return self._completed + sum(self._parts)
+
+
+class ProgressUpdater:
+    """Pushes every tracked counter into its Rich task from a single daemon thread."""
+
+    def __init__(self, progress, interval=PROGRESS_UPDATE_INTERVAL):
+        self.progress = progress
+        self.interval = interval
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="dl-progress", daemon=True)
+
+    def add_task(self, description, total, completed=0, num_parts=1):
+        counter = ProgressCounter(completed, num_parts)
+        task_id = self.progress.add_task(description, total=total, completed=completed)
+        with self._lock:
+            self._counters[task_id] = counter
+        return task_id, counter
+
+    def complete(self, task_id, total):
+        with self._lock:
+            self._counters.pop(task_id, None)
+        self.progress.update(task_id, completed=total)
+
+    def refresh(self):
+        with self._lock:
+            counters = list(self._counters.items())
+        for task_id, counter in counters:
+            self.progress.update(task_id, completed=counter.value)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._stop.set()
+        self._thread.join()
+        self.refresh()
+
+
+def split_ranges(file_size, num_threads):
+    """Split file_size into inclusive (start, end) byte ranges whose sizes differ by at most one byte."""
+    num_threads = max(1, min(num_threads, file_size // MIN_PART_SIZE))
+    q, r = divmod(file_size, num_threads)
+    ranges = []
+    offset = 0
+    for i in range(num_threads):
+        size = q + (1 if i < r else 0)
+        ranges.append((offset, offset + size - 1))
+        offset += size
+    return ranges
+
+
 # -------------------------------
 # Worker function (common)
 # -------------------------------
-def download_range(url, filename, start, end, part_num, progress_lock, progress_state, update_fn):
-    """Download a single range of a file and report progress via update_fn."""
-    part_file = f"{filename}.part{part_num}"
-    downloaded = os.path.getsize(part_file) if os.path.exists(part_file) else 0
-
-    while downloaded < (end - start + 1):
-        headers = {
-            "Range": f"bytes={start + downloaded}-{end}",
-            "User-Agent": "Mozilla/5.0",  # Pretend to be a browser
-        }
+def download_range(url, filename, fd, start, end, part_num, resume_state, counter, stop):
+    """
+        Download a single range of a file into fd and add the bytes flushed to disk to counter.
+        Returns early once stop is set (a sibling part failed).
+    """
+    part_size = end - start + 1
+    downloaded = resume_state.written(part_num)
+    attempt = 0
+
+    while downloaded < part_size and not stop.is_set():
+        headers = {"Range": f"bytes={start + downloaded}-{end}"}
+        last_saved = downloaded
+        attempt_start = downloaded
         try:
-            with requests.get(url, headers=headers, stream=True, timeout=10) as r:
-                r.raise_for_status()
-                with open(part_file, "ab") as f:
-                    for chunk in r.iter_content(8192):
-                        if not chunk:
-                            continue
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        with progress_lock:
-                            progress_state[0] += len(chunk)
-                            update_fn(progress_state[0])
-            break
-        except Exception as e:
-            wait_time = min(60, 2 ** min(downloaded // 1_000_000, 6))  # up to 64s
+            with pool_request("GET", url, headers=headers) as r:
+                raise_for_status(r)
+                if r.status != 206 and (start or downloaded):
+                    # Range was ignored, the body starts at byte 0 again
+                    if start:
+                        raise ValueError(f"Server ignored the Range header for part {part_num}")
+                    counter.add(part_num, -downloaded)
+                    downloaded = last_saved = attempt_start = 0
+                writer = BatchWriter(fd, start + downloaded)
+                received = downloaded
+                try:
+                    for chunk in r.stream(CHUNK_SIZE):
+                        if stop.is_set():
+                            break
+                        # never write past this part's end (e.g. a full 200 body)
+                        chunk = chunk[:part_size - received]
+                        received += len(chunk)
+                        flushed = writer.write(chunk)
+                        if flushed:
+                            downloaded += flushed
+                            counter.add(part_num, flushed)
+                        if downloaded - last_saved >= STATE_SAVE_BYTES:
+                            resume_state.update(part_num, downloaded)
+                            last_saved = downloaded
+                        if received >= part_size:
+                            break
+                finally:
+                    # keep whatever was received before a dropped connection
+                    flushed = writer.flush()
+                    downloaded += flushed
+                    counter.add(part_num, flushed)
+            if downloaded >= part_size or stop.is_set():
+                break
+            if downloaded == attempt_start:
+                raise urllib3.exceptions.ProtocolError("Response ended before the requested range")
+            # short but progressing body (e.g. the server caps range length): ask for the rest now
+            attempt = 0
+        except RETRYABLE_ERRORS as e:
+            # the backoff restarts whenever the failed attempt still made progress
+            attempt = 0 if downloaded > attempt_start else attempt + 1
+            wait_time = min(MAX_RETRY_WAIT, 2 ** attempt)
             print(f"[{Path(filename).name} - Part {part_num}] Error: {e} -> retrying in {wait_time}s")
-            time.sleep(wait_time)
+            stop.wait(wait_time)
+        finally:
+            resume_state.update(part_num, downloaded)
 
 
 # -------------------------------
 # Rich implementation
 # -------------------------------
-def download_file_rich(url, filename, executor, progress):
-    response = requests.head(url, allow_redirects=True)
+_FILEPATH_LOCKS = {}
+_FILEPATH_LOCKS_LOCK = threading.Lock()
+
+
+def filepath_lock(filename):
+    """Lock shared by every download that targets filename."""
+    key = os.path.normcase(os.path.abspath(filename))
+    with _FILEPATH_LOCKS_LOCK:
+        return _FILEPATH_LOCKS.setdefault(key, threading.Lock())
+
+
+def download_file_rich(url, storage_dir, ep, parts_executor, progress_updater):
+    """ Download url into storage_dir; with ep the filename comes from the HEAD's Content-Disposition """
+    # a finished file matching the last known size needs no HEAD round-trip
+    cached = _cached_head(url)
+    if cached:
+        filename = get_filepath(url, storage_dir, cached.get("content_disposition") if ep else None)
+        if (os.path.exists(filename) and not os.path.exists(f"{filename}.meta.json")
+                and os.path.getsize(filename) == cached["content_length"]):
+            print(f"{Path(filename).name} already downloaded.")
+            return
+
+    response, final_url = head(url)
+    filename = get_filepath(url, storage_dir, response.headers.get("Content-Disposition") if ep else None)
 
     content_type = response.headers.get("Content-Type", "").lower()
-    if (response.status_code < 200 or response.status_code > 299):
-        print(response.status_code)
+    if (response.status < 200 or response.status > 299):
+        print(response.status)
         print(response.headers['Location'], '\n')
     if "Content-Length" not in response.headers:
         print(f'Error :: \n\t{url}\n\tNo Content-Length\n\tContent-Type = {content_type}')
@@ -90,45 +600,73 @@ def download_file_rich(url, filename, executor, progress):
         raise Exception(f"URL points to non-downloadable content (Content-Type: {content_type})")
 
     file_size = int(response.headers["Content-Length"])
+    _cache_head(url, response, file_size)
 
-    if os.path.exists(filename) and os.path.getsize(filename) == file_size:
-        print(f"{Path(filename).name} already downloaded.")
-        return
+    # different entries can still resolve to the same target (same url tail or Content-Disposition)
+    with filepath_lock(filename):
+        download_to_file(url, final_url, response, filename, file_size, parts_executor, progress_updater)
 
-    num_threads = choose_threads(file_size)
-    part_size = ceil(file_size / num_threads)
-    ranges = [(i * part_size, min((i + 1) * part_size - 1, file_size - 1)) for i in range(num_threads)]
 
-    # preload progress
-    already_downloaded = sum(
-        os.path.getsize(f"{filename}.part{i}") for i in range(num_threads) if os.path.exists(f"{filename}.part{i}")
-    )
+def download_to_file(url, final_url, response, filename, file_size, parts_executor, progress_updater):
+    """ Download url (HEAD already answered by response) into filename, resuming when possible """
+    ranges = split_ranges(file_size, choose_threads(file_size))
+    resume_state = ResumeState(filename, file_size, ranges)
 
-    task_id = progress.add_task(filename, total=file_size, completed=already_downloaded)
-
-    progress_lock = threading.Lock()
-    progress_state = [already_downloaded]
+    # checked before the range probe so finished files cost no extra request
+    if not resume_state.exists() and os.path.exists(filename) and os.path.getsize(filename) == file_size:
+        print(f"{Path(filename).name} already downloaded.")
+        return
 
-    def update_fn(new_value):
-        progress.update(task_id, completed=new_value)
+    # a manifest matching the multi-part layout means an earlier run already saw Range work
+    if len(ranges) > 1 and resume_state.parts is None and not supports_ranges(final_url, response):
+        ranges = split_ranges(file_size, 1)  # every part would receive the whole file
+        resume_state = ResumeState(filename, file_size, ranges)
 
-    futures = [
-        executor.submit(download_range, url, filename, start, end, i, progress_lock, progress_state, update_fn)
-        for i, (start, end) in enumerate(ranges)
-    ]
+    # a missing/stale manifest means the target holds nothing we can resume from
+    truncate = resume_state.parts is None
+    if truncate:
+        resume_state.reset(ranges)
+    updateTrackedDownloads(filename, url, "add")
 
-    for f in as_completed(futures):
-        f.result()
+    # preload progress
+    already_downloaded = resume_state.total_written()
 
-    progress.update(task_id, completed=file_size)
+    task_id, counter = progress_updater.add_task(
+        filename, total=file_size, completed=already_downloaded, num_parts=len(ranges)
+    )
 
-    # merge parts
-    with open(filename, "wb") as outfile:
-        for i in range(num_threads):
-            part_file = f"{filename}.part{i}"
-            with open(part_file, "rb") as infile:
-                outfile.write(infile.read())
-            os.remove(part_file)
+    stop = threading.Event()
+    futures = []
+    fd = open_target(filename, file_size, truncate)
+    try:
+        futures = [
+            parts_executor.submit(
+                download_range, url, filename, fd, start, end, i,
+                resume_state, counter, stop
+            )
+            for i, (start, end) in enumerate(ranges)
+        ]
+
+        for f in as_completed(futures):
+            f.result()
+    except BaseException:
+        stop.set()
+        for f in futures:
+            f.cancel()
+        raise
+    finally:
+        # the parts share fd: it must outlive every one of them
+        wait(futures)
+        os.close(fd)
+        resume_state.close()
+
+    # the target is preallocated, so only the manifest can tell a finished file from one with holes
+    if resume_state.total_written() != file_size:
+        raise Exception(f"{Path(filename).name} incomplete: {resume_state.total_written()} of {file_size} bytes written")
+
+    progress_updater.complete(task_id, file_size)
+    resume_state.remove()
+    updateTrackedDownloads(filename, url, "remove")
 
     print(f"✅ Download complete: {filename}")
 
@@ -138,7 +676,9 @@ def download_file_rich(url, filename, executor, progress):
 # -------------------------------
 def start_download(files, max_workers=None):
     if max_workers is None:
-        max_workers = min(32, os.cpu_count() * 2)
+        max_workers = DEFAULT_MAX_WORKERS
+
+    files = prepare_downloads(files)
 
     progress_columns = [
         TextColumn("[bold blue]{task.description}", justify="right"),
@@ -152,43 +692,55 @@ def start_download(files, max_workers=None):
     from rich.console import Console
     console = Console()
 
-    with Progress(*progress_columns, console=console) as progress:
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [
-                executor.submit(download_file_rich, url, filename, executor, progress)
-                for url, filename in files
-            ]
-            for f in as_completed(futures):
-                f.result()
+    try:
+        with Progress(*progress_columns, console=console) as progress, ProgressUpdater(progress) as progress_updater:
+            # files and parts get separate pools so queued files can't starve the parts they wait on
+            files_workers = max(1, min(MAX_CONCURRENT_FILES, len(files)))
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dl-part") as parts_exec, \
+                    ThreadPoolExecutor(max_workers=files_workers, thread_name_prefix="dl-file") as files_exec:
+                futures = [
+                    files_exec.submit(download_file_rich, url, storage_dir, ep, parts_exec, progress_updater)
+                    for url, storage_dir, ep in files
+                ]
+                for f in as_completed(futures):
+                    f.result()
+    finally:
+        save_head_cache()  # once per batch rather than once per HEAD
 
 # Example use
 # if __name__ == "__main__":
 #     files_to_download = [
-#         ("https://example.com/file1.zip", "file1.zip"),
-#         ("https://example.com/file2.mp4", "file2.mp4"),
+#         ("https://example.com/file1.zip", "downloads", False),
+#         ("https://example.com/file2.mp4", "downloads", False),
 #     ]
 
 #     start_download(files_to_download, max_workers=8)
 
 
-def get_filepath(url, dir_path, ep=None):
-    if ep:
-        response = requests.head(url, allow_redirects=True)
-        filename = response.headers['Content-Disposition'].split('filename=')[-1]
+def get_filepath(url, dir_path, content_disposition=None):
+    """ Builds the storage filepath from a Content-Disposition header when given, else from the url """
+    if content_disposition:
+        filename = content_disposition.split('filename=')[-1]
     else:
         filename = url.split('/')[-1]
-    filename = filename.replace('%20', ' ')
-    filename = filename.replace('%5B', '[')
-    filename = filename.replace('%5D', ']')
-    filename = filename.replace('"', '')
-    if len(filename) > 205:
-        filename = filename[:200] + filename[-4:]
+    filename = unquote(filename).translate(FILENAME_TRANSLATION)
+    if filename.strip('.') == '':
+        filename = filename.replace('.', '_') or '_'  # "", "." and ".." would name the directory itself
+    if len(filename) > MAX_FILENAME_LENGTH:
+        filename = filename[:MAX_FILENAME_LENGTH - FILENAME_SUFFIX_LENGTH] + filename[-FILENAME_SUFFIX_LENGTH:]
     filepath = Path(dir_path).joinpath(filename)
     return str(filepath)
 
 
+def parse_url_entry(url, storage_dir):
+    """ Returns the (url, storage_dir, ep) tuple for a stripped url entry, honouring the "ep__" prefix """
+    if url[:4] == "ep__":
+        return url[4:], storage_dir, True
+    return url, storage_dir, False
+
+
 def parseInputFile(input_filepath, file_type, storage_dir=None):
-    """ Returns a list of (url, filepath) tuples """
+    """ Returns a list of (url, storage_dir, ep) tuples """
     if not Path(input_filepath).exists():
         print(f'Error :: Filepath "{input_filepath}" does not exists')
         return
@@ -202,47 +754,25 @@ def parseInputFile(input_filepath, file_type, storage_dir=None):
                 print(f'Error :: storage filepath "{storage_dir}" does not exists')
                 return
             with open(input_filepath, 'r', encoding='utf-8') as fh:
-                file_lines = fh.readlines()
-            dl_url_lines = [
-                line for line in file_lines if not line.strip().startswith("#")
-            ]
-            for url_line in dl_url_lines:
-                url_line = url_line.strip()
-                if not url_line or url_line[0] == '#':
-                    continue
-                if url_line:
-                    if url_line[:4] == "ep__":
-                        url_line = url_line[4:]
-                        filepath = get_filepath(url_line, storage_dir, True)
-                    else:
-                        filepath = get_filepath(url_line, storage_dir)
-                    payload.append((url_line, filepath))
+                payload = [
+                    parse_url_entry(url_line, storage_dir)
+                    for url_line in map(str.strip, fh)
+                    if url_line and url_line[0] != '#'
+                ]
         case "json":
             # filter comments
-            with open(input_filepath, 'r', encoding='utf-8') as fh:
-                file_lines = fh.readlines()
-            dl_url_lines = [
-                line for line in file_lines
-                if not line.strip().startswith("#") and not line.strip().startswith("//")
-            ]
-            json_string = "".join(dl_url_lines)
-            file_dict = json.loads(json_string)
-
-            for storage_dir in file_dict.keys():
+            raw = JSON_COMMENT_LINE.sub(b"", Path(input_filepath).read_bytes())
+            file_dict = _json.loads(raw)
+
+            for storage_dir, urls in file_dict.items():
                 if not Path(storage_dir).exists():
                     print(f'Error :: Storage path "{input_filepath}" does not exists')
                     continue
-                for url in file_dict[storage_dir]:
-                    url = url.strip()
-                    if not url or url[0] == '#' or url[:2] == "//":
-                        continue
-                    if url:
-                        if url[:4] == "ep__":
-                            url = url[4:]
-                            filepath = get_filepath(url, storage_dir, True)
-                        else:
-                            filepath = get_filepath(url, storage_dir)
-                        payload.append((url, filepath))
+                payload.extend(
+                    parse_url_entry(url, storage_dir)
+                    for url in map(str.strip, urls)
+                    if url and url[0] != '#' and url[:2] != "//"
+                )
     return payload
 
 
@@ -268,7 +798,7 @@ def startInteractiveSession(args):
     ep = None
     url = None
     prompt = None
-    filepath = None
+    url_ep = False
     storage_dirpath = None
     files_to_download = list()
 
@@ -286,11 +816,8 @@ def startInteractiveSession(args):
             case "--url":
                 prompt = input("[url] :: ")
                 url = prompt.strip()
-                if url[:4] == "ep__" or ep:
-                    url = url[4:] if url[:4] == "ep__" else url
-                    filepath = get_filepath(url, storage_dirpath, True)
-                else:
-                    filepath = get_filepath(url, storage_dirpath)
+                url_ep = url[:4] == "ep__" or bool(ep)
+                url = url[4:] if url[:4] == "ep__" else url
                 print(f'URL set to "{url}"')
             case "--ep":
                 ep = True
@@ -304,26 +831,28 @@ def startInteractiveSession(args):
                     print("Error :: No storage dir path")
                     continue
                 with StandbyLock():
-                    start_download([(url, filepath)])
+                    start_download([(url, storage_dirpath, url_ep)])
                     print("Download complete\n")
             case "--dl_txt":
                 if not storage_dirpath:
                     print("Error :: No storage dir path")
                     continue
                 files_to_download = parseInputFile(TXT_DATA_FILEPATH, 'txt', storage_dirpath)
-                with StandbyLock():
-                    for download_data in files_to_download:
-                        start_download([download_data])
+                if files_to_download:
+                    with StandbyLock():
+                        start_download(files_to_download)
             case "--dl_json":
                 files_to_download = parseInputFile(JSON_DATA_FILEPATH, 'json')
-                with StandbyLock():
-                    for download_data in files_to_download:
-                        start_download([download_data])
+                if files_to_download:
+                    with StandbyLock():
+                        start_download(files_to_download)
             case "--cls":
                 os.system("cls")
 
 
-# wip
+_TRACKED_DOWNLOADS_LOCK = threading.Lock()
+
+
 def updateTrackedDownloads(storage_filepath, url, update_type):
     """
         Definitions
@@ -338,7 +867,21 @@ def updateTrackedDownloads(storage_filepath, url, update_type):
         * url :: valid url string
         * update_tye :: string ["add", "remove"]
     """
-    ...
+    with _TRACKED_DOWNLOADS_LOCK:
+        try:
+            with open(UNFINISHED_DOWNLOADS_FILEPATH, 'r', encoding='utf-8') as fh:
+                tracked = json.load(fh)
+        except (OSError, ValueError):
+            tracked = {}  # missing or freshly touched file
+
+        match update_type:
+            case "add":
+                tracked[storage_filepath] = url
+            case "remove":
+                tracked.pop(storage_filepath, None)
+
+        with open(UNFINISHED_DOWNLOADS_FILEPATH, 'w', encoding='utf-8') as fh:
+            json.dump(tracked, fh, indent=4)
 
 
 def checkInputFiles():
@@ -356,7 +899,7 @@ def checkInputFiles():
 """
     Futures
     =======
-    [] track unfinished downloads
+    [x] track unfinished downloads
 """
 
 
@@ -396,13 +939,11 @@ if __name__ == '__main__':
             files_to_download = []
             if args.url:
                 download_urls.append(args.url)
-                filepath = get_filepath(args.url, args.save_to, args.ep)
-                start_download([(args.url, filepath)])
+                files_to_download.append((args.url, args.save_to, args.ep))
             if args.dl_txt:
-                files_to_download = parseInputFile(TXT_DATA_FILEPATH, 'txt', args.save_to)
-                for download_data in files_to_download:
-                    start_download([download_data])
+                files_to_download += parseInputFile(TXT_DATA_FILEPATH, 'txt', args.save_to) or []
             if args.dl_json:
-                files_to_download = parseInputFile(JSON_DATA_FILEPATH, 'json')
-                for download_data in files_to_download:
-                    start_download([download_data])
+                files_to_download += parseInputFile(JSON_DATA_FILEPATH, 'json') or []
+            # one batch: a single progress display and pool pair for every file
+            if files_to_download:
+                start_download(files_to_download)